@@ -90,8 +90,10 @@ def get_db_connection():
     thread‑safe by default when used from multiple threads (as in
     ``ThreadingHTTPServer``).  Consequently, each request handler
     obtains its own connection.  ``check_same_thread=False`` allows
-    connections to be shared across threads safely."""
-    conn = sqlite3.connect(DB_FILENAME, check_same_thread=False)
+    connections to be shared across threads safely.  ``uri=True`` accepts
+    ``file:`` URIs (e.g. an in-memory database in tests); plain paths are
+    opened as before."""
+    conn = sqlite3.connect(DB_FILENAME, check_same_thread=False, uri=True)
     conn.row_factory = sqlite3.Row
     return conn
 
@@ -260,6 +262,12 @@ def init_db():
                FOREIGN KEY (user_id) REFERENCES users(id)
            );'''
     )
+    # Expired sessions are purged on every authenticated request; the
+    # index turns that DELETE into a range search.  Lookups by token use
+    # the primary key's own index.
+    cur.execute(
+        'CREATE INDEX IF NOT EXISTS idx_sessions_expires_at ON sessions(expires_at)'
+    )
     # Logs: record key user actions
     cur.execute(
         '''CREATE TABLE IF NOT EXISTS logs (
@@ -429,13 +437,34 @@ def init_db():
 # Helper functions
 #############################
 
+# PBKDF2 work factor.  ``BANDTRACK_KDF_ITERS`` lets the test suite use a
+# trivial count; stored hashes only verify with the count that produced them.
+DEFAULT_PBKDF2_ITERATIONS = 100_000
+
+def pbkdf2_iterations_from_env() -> int:
+    """Return the PBKDF2 iteration count from ``BANDTRACK_KDF_ITERS``, or
+    the default when it is unset.  Anything but a positive integer raises
+    ``RuntimeError`` so a bad value stops the server at startup."""
+    raw = os.environ.get('BANDTRACK_KDF_ITERS')
+    if raw is None:
+        return DEFAULT_PBKDF2_ITERATIONS
+    try:
+        iterations = int(raw)
+    except ValueError:
+        iterations = 0
+    if iterations < 1:
+        raise RuntimeError(f'BANDTRACK_KDF_ITERS must be a positive integer, got {raw!r}')
+    return iterations
+
+PBKDF2_ITERATIONS = pbkdf2_iterations_from_env()
+
 def hash_password(password: str, salt: bytes | None = None) -> tuple[bytes, bytes]:
     """Hash a password with PBKDF2.  If ``salt`` is None, a new 16‑byte salt
     is generated.  Returns a tuple of (salt, password_hash)."""
     if salt is None:
         salt = os.urandom(16)
-    # Use PBKDF2 with SHA‑256 and 100_000 iterations (reasonable trade‑off)
-    hashed = hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'), salt, 100_000)
+    # Use PBKDF2 with SHA‑256 and 100_000 iterations by default (reasonable trade‑off)
+    hashed = hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'), salt, PBKDF2_ITERATIONS)
     return salt, hashed
 
 def verify_password(password: str, salt: bytes, expected_hash: bytes) -> bool:
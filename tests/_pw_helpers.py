@@ -0,0 +1,46 @@
+# Playwright settings and helpers shared by the UI tests.
+
+from test_api import bootstrap_user
+
+# Chromium subsystems the tests never use: GPU, sandbox and zygote
+# processes, /dev/shm checks, extensions and background work.
+CHROMIUM_FAST_ARGS = [
+    "--no-sandbox",
+    "--disable-dev-shm-usage",
+    "--disable-gpu",
+    "--no-zygote",
+    "--disable-extensions",
+    "--disable-background-networking",
+    "--disable-renderer-backgrounding",
+]
+
+
+def make_authed_context(browser, cookie):
+    # Browser context that starts with the session cookie already set, so
+    # no separate add_cookies() call is needed.  ``cookie`` is the
+    # "session_id=<token>" pair returned by bootstrap_user().
+    name, value = cookie.split("=", 1)
+    return browser.new_context(storage_state={
+        "cookies": [{
+            "name": name,
+            "value": value,
+            "domain": "127.0.0.1",
+            "path": "/",
+            "expires": -1,
+            "httpOnly": True,
+            "secure": False,
+            "sameSite": "Lax",
+        }],
+        "origins": [],
+    })
+
+
+def authed_page(port, browser, username, *, group=None, path="/"):
+    # New user with an open session (and optionally a group), logged into a
+    # fresh context whose page is already at ``path``.  The caller closes
+    # the returned context.
+    cookie, _ = bootstrap_user(port, username, group=group)
+    context = make_authed_context(browser, cookie)
+    page = context.new_page()
+    page.goto(f"http://127.0.0.1:{port}{path}")
+    return page, context
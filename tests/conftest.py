@@ -0,0 +1,86 @@
+import os, sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import pytest
+
+# Must be set before ``server`` is imported: tests don't need a costly KDF.
+os.environ.setdefault("BANDTRACK_KDF_ITERS", "1")
+
+from _pw_helpers import CHROMIUM_FAST_ARGS
+from test_api import build_template_db, load_memory_db, start_test_server, stop_test_server, reset_db
+import server
+
+
+@pytest.fixture(scope="session")
+def template_db(tmp_path_factory):
+    # Schema built once per session; servers start from a copy of it
+    path = tmp_path_factory.mktemp("template") / "template.db"
+    build_template_db(path)
+    return path
+
+
+@pytest.fixture(scope="session")
+def live_server(template_db):
+    # One server for the whole session; tests get a clean database through
+    # the ``port`` fixture instead of starting their own server.  The
+    # database is a shared-cache in-memory copy of the template, so commits
+    # never touch the disk.
+    db_path = "file:bandtrack_test?mode=memory&cache=shared"
+    httpd, thread, port = start_test_server(
+        db_path, template_db, threaded=False, keep_alive=True
+    )
+    yield db_path, port
+    stop_test_server(httpd, thread)
+
+
+@pytest.fixture
+def port(live_server):
+    db_path, port = live_server
+    server.DB_FILENAME = db_path
+    reset_db()
+    return port
+
+
+@pytest.fixture(scope="session")
+def inproc_db(template_db):
+    # Database for tests that dispatch through test_api.call(): an
+    # in-memory copy of the template with no server in front of it.
+    uri = "file:bandtrack_inproc?mode=memory&cache=shared"
+    keeper = load_memory_db(uri, template_db)
+    yield uri
+    keeper.close()
+
+
+@pytest.fixture
+def clean_db(inproc_db):
+    server.DB_FILENAME = inproc_db
+    reset_db()
+
+
+@pytest.fixture(scope="module")
+def ui_server(tmp_path_factory, template_db):
+    # Browser tests need a threaded server; one per module is shared by its
+    # tests, which get a clean database through ``ui_port``.
+    db_path = tmp_path_factory.mktemp("ui") / "test.db"
+    httpd, thread, port = start_test_server(db_path, template_db, keep_alive=True)
+    yield db_path, port
+    stop_test_server(httpd, thread)
+
+
+@pytest.fixture
+def ui_port(ui_server):
+    db_path, port = ui_server
+    server.DB_FILENAME = str(db_path)
+    reset_db()
+    return port
+
+
+@pytest.fixture(scope="session")
+def playwright_browser():
+    # One Chromium for the whole session; each UI test opens its own
+    # context.  Skips the UI tests when Playwright is not installed.
+    sync_api = pytest.importorskip("playwright.sync_api")
+    with sync_api.sync_playwright() as p:
+        browser = p.chromium.launch(args=CHROMIUM_FAST_ARGS, chromium_sandbox=False)
+        yield browser
+        browser.close()
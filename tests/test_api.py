@@ -1,243 +1,491 @@
-import os, sys
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import functools
+import hashlib
 import json
+import secrets
+import select
+import shutil
+import socketserver
+import sqlite3
 import threading
 import http.client
+import http.server
+import io
 import time
+
+import pytest
 import server
 
+try:
+    # orjson parses straight from the response bytes, serialises straight to
+    # bytes and is several times faster than the stdlib; it is optional.
+    from orjson import dumps, loads
+except ImportError:
+    from json import loads
+
+    def dumps(obj):
+        return json.dumps(obj).encode()
+
+# Rows inserted by ``init_db`` (default settings, sqlite_sequence counters)
+# which ``reset_db`` restores after emptying the tables.
+_seed_rows = {}
 
-def start_test_server(tmp_db_path):
-    server.DB_FILENAME = str(tmp_db_path)
+# Client connections reused by request(), per thread and keyed by port.
+_connections = threading.local()
+
+def build_template_db(path):
+    server.DB_FILENAME = str(path)
     server.init_db()
-    httpd = server.ThreadingHTTPServer(("127.0.0.1", 0), server.BandTrackHandler)
+    _capture_seed_rows()
+
+
+class QuietHandler(server.BandTrackHandler):
+    # The access log goes to stderr once per request; tests don't need it.
+    def log_message(self, format, *args):
+        pass
+
+
+class KeepAliveHandler(QuietHandler):
+    # Speaks HTTP/1.1 so request() can send every call over one connection.
+    # All of the handler's responses carry a Content-Length, which is what
+    # persistent connections need.  Headers and body go out in separate
+    # writes, so Nagle's algorithm is disabled to avoid delayed-ACK stalls.
+    # An idle connection is dropped after ``timeout`` seconds; request()
+    # reconnects transparently.
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    timeout = 5
+
+
+class LocalHTTPServer(http.server.HTTPServer):
+    # HTTPServer already sets SO_REUSEADDR.  A page load opens a burst of
+    # connections, and the default listen backlog of 5 can overflow and
+    # push clients into SYN retransmits.
+    request_queue_size = 128
+
+
+class ThreadingLocalHTTPServer(socketserver.ThreadingMixIn, LocalHTTPServer):
+    daemon_threads = True
+
+
+def load_memory_db(uri, template_db):
+    # Copy the template into a shared-cache in-memory URI and point the
+    # server at it.  The database lives as long as one connection to it is
+    # open, so the caller keeps the returned one until it is done.
+    keeper = sqlite3.connect(uri, uri=True, check_same_thread=False)
+    source = sqlite3.connect(template_db)
+    source.backup(keeper)
+    source.close()
+    server.DB_FILENAME = uri
+    return keeper
+
+
+def start_test_server(tmp_db_path, template_db=None, threaded=True, keep_alive=False):
+    # Clients that send one request at a time (the API tests) can pass
+    # threaded=False: requests are then handled in the serving thread
+    # instead of spawning a thread per connection.  Browser tests open
+    # several connections at once and need the threaded server.
+    keeper = None
+    if template_db is None:
+        build_template_db(tmp_db_path)
+    elif str(tmp_db_path).startswith("file:"):
+        # Kept open alongside the server, see load_memory_db()
+        keeper = load_memory_db(str(tmp_db_path), template_db)
+    else:
+        # Copying an initialised database skips all of init_db()'s DDL
+        shutil.copyfile(template_db, tmp_db_path)
+        server.DB_FILENAME = str(tmp_db_path)
+    server_class = ThreadingLocalHTTPServer if threaded else LocalHTTPServer
+    handler_class = KeepAliveHandler if keep_alive else QuietHandler
+    httpd = server_class(("127.0.0.1", 0), handler_class)
+    httpd.db_keeper = keeper
     port = httpd.server_address[1]
     thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    # The constructor has already bound and started listening, so clients
+    # can connect as soon as this returns; no warm-up sleep is needed.
     thread.start()
-    # Give server time to start
-    time.sleep(0.1)
     return httpd, thread, port
 
 
 def stop_test_server(httpd, thread):
+    # A kept-alive connection would hold a single-threaded server inside
+    # its handler and block shutdown().
+    close_connections()
     httpd.shutdown()
     thread.join()
+    # shutdown() only stops serve_forever(); release the listening socket.
+    httpd.server_close()
+    if httpd.db_keeper is not None:
+        httpd.db_keeper.close()
+
+
+def _capture_seed_rows():
+    conn = server.get_db_connection()
+    cur = conn.cursor()
+    cur.execute("SELECT name FROM sqlite_master WHERE type = 'table'")
+    tables = [row["name"] for row in cur.fetchall()]
+    _seed_rows.clear()
+    for table in tables:
+        cur.execute(f"SELECT * FROM {table}")
+        _seed_rows[table] = [tuple(row) for row in cur.fetchall()]
+    conn.close()
+
+
+def reset_db():
+    # Truncating the tables is much cheaper than rebuilding the schema
+    # with init_db() on a brand-new file for every test.
+    # All statements share one transaction, hence a single commit.
+    conn = server.get_db_connection()
+    with conn:
+        for table, rows in _seed_rows.items():
+            conn.execute(f"DELETE FROM {table}")
+            if rows:
+                placeholders = ", ".join("?" * len(rows[0]))
+                conn.executemany(f"INSERT INTO {table} VALUES ({placeholders})", rows)
+    conn.close()
+
+
+# The fixed test password is hashed once at import so that users created
+# with make_user_session() skip /api/register, /api/login and their PBKDF2
+# cost entirely.
+_PW_SALT, _PW_HASH = server.hash_password("pw")
+
+
+def make_user_session(username):
+    token = secrets.token_hex(32)
+    conn = server.get_db_connection()
+    with conn:
+        cur = conn.cursor()
+        # Mirror /api/register: the first user becomes admin of group 1
+        cur.execute("SELECT 1 FROM users LIMIT 1")
+        role = "user" if cur.fetchone() else "admin"
+        cur.execute(
+            "INSERT INTO users (username, salt, password_hash, role, last_group_id) VALUES (?, ?, ?, ?, 1)",
+            (username, _PW_SALT, _PW_HASH, role),
+        )
+        user_id = cur.lastrowid
+        cur.execute(
+            "INSERT INTO memberships (user_id, group_id, role, active) VALUES (?, 1, ?, 1)",
+            (user_id, role),
+        )
+        cur.execute(
+            "INSERT INTO sessions (token, user_id, group_id, expires_at) VALUES (?, ?, 1, ?)",
+            (token, user_id, int(time.time()) + 7 * 24 * 3600),
+        )
+    conn.close()
+    return {"Cookie": f"session_id={token}"}
+
+
+def user_exists(username):
+    # Direct lookup, matching usernames case-insensitively like /api/register
+    conn = server.get_db_connection()
+    row = conn.execute(
+        "SELECT 1 FROM users WHERE LOWER(username) = LOWER(?) LIMIT 1", (username,)
+    ).fetchone()
+    conn.close()
+    return row is not None
+
+
+def bootstrap_user(port, username, *, group=None):
+    # Session cookie for a new user, plus the id of a group created through
+    # the API when ``group`` is given: one request instead of three.
+    headers = make_user_session(username)
+    group_id = None
+    if group is not None:
+        status, _, body = request("POST", port, "/api/groups", {"name": group}, headers)
+        assert status == 201
+        group_id = loads(body)["id"]
+    return headers["Cookie"], group_id
+
+
+def encode_body(body):
+    # Bodies already encoded (see creds()) are sent as they are.
+    return body if isinstance(body, bytes) else dumps(body)
+
+
+@functools.lru_cache(maxsize=256)
+def creds(username, password="pw"):
+    # JSON login/register payload, serialised once per distinct pair.
+    return encode_body({"username": username, "password": password})
+
+
+def _connection(port):
+    pool = _connections.__dict__.setdefault("pool", {})
+    if port not in pool:
+        pool[port] = http.client.HTTPConnection("127.0.0.1", port)
+    conn = pool[port]
+    # An idle kept-alive socket only turns readable when the server has
+    # closed it; reconnect instead of sending into it.
+    if conn.sock is not None and select.select([conn.sock], [], [], 0)[0]:
+        conn.close()
+    return conn
+
+
+def close_connections():
+    for conn in _connections.__dict__.pop("pool", {}).values():
+        conn.close()
 
 
 def request(method, port, path, body=None, headers=None):
-    conn = http.client.HTTPConnection("127.0.0.1", port)
     data = None
     if body is not None:
-        data = json.dumps(body).encode()
+        data = encode_body(body)
         headers = {"Content-Type": "application/json", **(headers or {})}
-    conn.request(method, path, data, headers or {})
+    headers = {"Connection": "keep-alive", **(headers or {})}
+    conn = _connection(port)
+    reused = conn.sock is not None
+    try:
+        conn.request(method, path, data, headers)
+    except ConnectionError:
+        # Only a reused idle connection may have broken before the request
+        # reached the server; any other failure belongs to the test.
+        if not reused:
+            raise
+        conn.close()
+        conn.request(method, path, data, headers)
     res = conn.getresponse()
-    res_body = res.read()
-    status = res.status
-    resp_headers = dict(res.getheaders())
-    conn.close()
-    return status, resp_headers, res_body
+    # Read the whole body so the connection can carry the next request.
+    # HTTP/1.0 servers close it instead and http.client reconnects.
+    content_length = res.getheader("Content-Length")
+    if content_length and content_length.isdigit():
+        res_body = res.read(int(content_length))
+    else:
+        res_body = res.read()
+    return res.status, res.msg, res_body
+
+
+class _InprocSocket:
+    # Just enough of a socket for BandTrackHandler and HTTPResponse: reads
+    # come from ``data`` and writes are collected in ``sent``.
+    def __init__(self, data):
+        self.data = data
+        self.sent = bytearray()
+
+    def makefile(self, mode, *args, **kwargs):
+        return io.BytesIO(self.data)
+
+    def sendall(self, data):
+        self.sent += data
+
+
+def call(method, path, body=None, headers=None):
+    # Like request(), but runs the handler in the test thread against
+    # in-memory buffers: no server, no TCP.  Returns the same triple.
+    data = b""
+    if body is not None:
+        data = encode_body(body)
+        headers = {"Content-Type": "application/json", **(headers or {})}
+    lines = [f"{method} {path} HTTP/1.1", f"Content-Length: {len(data)}", "Connection: close"]
+    lines += [f"{name}: {value}" for name, value in (headers or {}).items()]
+    sock = _InprocSocket(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + data)
+    QuietHandler(sock, ("127.0.0.1", 0), None)
+    res = http.client.HTTPResponse(_InprocSocket(bytes(sock.sent)))
+    res.begin()
+    return res.status, res.msg, res.read()
 
 
 def extract_cookie(headers):
+    # ``headers`` is the response's header Message, as returned by request()
     cookie = headers.get("Set-Cookie")
     if not cookie:
         return None
     return cookie.split(";", 1)[0]
 
 
-def test_register_and_login(tmp_path):
-    httpd, thread, port = start_test_server(tmp_path / "test.db")
-    try:
-        status, headers, _ = request(
-            "POST",
-            port,
-            "/api/register",
-            {"username": "alice", "password": "secret"},
-        )
-        assert status == 200
-        status, headers, _ = request(
-            "POST",
-            port,
-            "/api/login",
-            {"username": "alice", "password": "secret"},
-        )
-        assert status == 200
-        cookie = extract_cookie(headers)
-        assert cookie and cookie.startswith("session_id=")
-    finally:
-        stop_test_server(httpd, thread)
-
-
-def test_login_without_group(tmp_path):
-    httpd, thread, port = start_test_server(tmp_path / "test.db")
-    try:
-        request(
-            "POST",
-            port,
-            "/api/register",
-            {"username": "dave", "password": "pw"},
-        )
-        # Remove group memberships for this user
-        conn = server.get_db_connection()
-        cur = conn.cursor()
-        cur.execute(
-            "DELETE FROM memberships WHERE user_id = (SELECT id FROM users WHERE username = ?)",
-            ("dave",),
-        )
-        conn.commit()
-        conn.close()
-        status, headers, body = request(
-            "POST", port, "/api/login", {"username": "dave", "password": "pw"}
+def members_by(key, body):
+    # Parse a member list once and index it, e.g. members_by("username", body)
+    return {m[key]: m for m in loads(body)}
+
+
+def register_login(port, username, password="pw"):
+    # /api/register already opens a session, so one round trip yields the
+    # cookie a separate /api/login would have returned.
+    status, headers, _ = request("POST", port, "/api/register", creds(username, password))
+    assert status == 200
+    return extract_cookie(headers)
+
+
+def test_register_and_login(port):
+    status, headers, _ = request(
+        "POST",
+        port,
+        "/api/register",
+        creds("alice", "secret"),
+    )
+    assert status == 200
+    status, headers, _ = request(
+        "POST",
+        port,
+        "/api/login",
+        creds("alice", "secret"),
+    )
+    assert status == 200
+    cookie = extract_cookie(headers)
+    assert cookie and cookie.startswith("session_id=")
+
+
+def test_login_without_group(port):
+    request(
+        "POST",
+        port,
+        "/api/register",
+        creds("dave"),
+    )
+    # Remove group memberships for this user
+    conn = server.get_db_connection()
+    cur = conn.cursor()
+    cur.execute(
+        "DELETE FROM memberships WHERE user_id = (SELECT id FROM users WHERE username = ?)",
+        ("dave",),
+    )
+    conn.commit()
+    conn.close()
+    status, headers, body = request(
+        "POST", port, "/api/login", creds("dave")
+    )
+    assert status == 200
+    data = loads(body)
+    assert data["user"]["needsGroup"] is True
+    cookie = extract_cookie(headers)
+    headers = {"Cookie": cookie}
+    status, _, body = request("GET", port, "/api/me", headers=headers)
+    assert status == 200
+    assert loads(body)["needsGroup"] is True
+
+
+def test_suggestions_crud(port):
+    headers = make_user_session("bob")
+
+    status, _, body = request("POST", port, "/api/1/suggestions", {"title": "Song", "versionOf": "Orig"}, headers)
+    assert status == 201
+    sug_id = loads(body)["id"]
+
+    status, _, body = request("GET", port, "/api/1/suggestions", headers=headers)
+    assert status == 200
+    suggestions = loads(body)
+    assert len(suggestions) == 1
+    assert suggestions[0]["versionOf"] == "Orig"
+
+    status, _, _ = request("PUT", port, f"/api/1/suggestions/{sug_id}", {"title": "Song2", "versionOf": "New"}, headers)
+    assert status == 200
+    status, _, body = request("GET", port, "/api/1/suggestions", headers=headers)
+    data = loads(body)
+    assert data[0]["title"] == "Song2"
+    assert data[0]["versionOf"] == "New"
+
+    status, _, _ = request("DELETE", port, f"/api/1/suggestions/{sug_id}", headers=headers)
+    assert status == 200
+    status, _, body = request("GET", port, "/api/1/suggestions", headers=headers)
+    assert loads(body) == []
+
+
+def test_rehearsals_crud(port):
+    headers = make_user_session("carol")
+
+    status, _, body = request("POST", port, "/api/1/rehearsals", {"title": "R1", "versionOf": "Orig"}, headers)
+    assert status == 201
+    reh_id = loads(body)["id"]
+
+    status, _, _ = request("PUT", port, f"/api/1/rehearsals/{reh_id}", {"level": 5, "note": "ok"}, headers)
+    assert status == 200
+
+    status, _, _ = request("PUT", port, f"/api/1/rehearsals/{reh_id}", {"versionOf": "New"}, headers)
+    assert status == 200
+
+    status, _, body = request("PUT", port, f"/api/1/rehearsals/{reh_id}/mastered", headers=headers)
+    assert status == 200
+    assert loads(body)["mastered"] is True
+    status, _, body = request("GET", port, "/api/1/rehearsals", headers=headers)
+    assert loads(body)[0]["versionOf"] == "New"
+
+    status, _, _ = request("DELETE", port, f"/api/1/rehearsals/{reh_id}", headers=headers)
+    assert status == 200
+    status, _, body = request("GET", port, "/api/1/rehearsals", headers=headers)
+    assert loads(body) == []
+
+
+def test_rehearsals_sorted_by_average(port):
+    headers = make_user_session("u1")
+
+    # Create three songs and assign different levels
+    ids = []
+    for title in ["A", "B", "C"]:
+        status, _, body = request(
+            "POST", port, "/api/1/rehearsals", {"title": title}, headers
         )
-        assert status == 200
-        data = json.loads(body)
-        assert data["user"]["needsGroup"] is True
-        cookie = extract_cookie(headers)
-        headers = {"Cookie": cookie}
-        status, _, body = request("GET", port, "/api/me", headers=headers)
-        assert status == 200
-        assert json.loads(body)["needsGroup"] is True
-    finally:
-        stop_test_server(httpd, thread)
-
-
-def test_suggestions_crud(tmp_path):
-    httpd, thread, port = start_test_server(tmp_path / "test.db")
-    try:
-        request("POST", port, "/api/register", {"username": "bob", "password": "pw"})
-        status, headers, _ = request("POST", port, "/api/login", {"username": "bob", "password": "pw"})
-        cookie = extract_cookie(headers)
-        headers = {"Cookie": cookie}
-
-        status, _, body = request("POST", port, "/api/1/suggestions", {"title": "Song", "versionOf": "Orig"}, headers)
         assert status == 201
-        sug_id = json.loads(body)["id"]
+        ids.append(loads(body)["id"])
 
-        status, _, body = request("GET", port, "/api/1/suggestions", headers=headers)
+    for rid, level in zip(ids, [3, 7, 5]):
+        status, _, _ = request(
+            "PUT", port, f"/api/1/rehearsals/{rid}", {"level": level}, headers
+        )
         assert status == 200
-        suggestions = json.loads(body)
-        assert len(suggestions) == 1
-        assert suggestions[0]["versionOf"] == "Orig"
 
-        status, _, _ = request("PUT", port, f"/api/1/suggestions/{sug_id}", {"title": "Song2", "versionOf": "New"}, headers)
-        assert status == 200
-        status, _, body = request("GET", port, "/api/1/suggestions", headers=headers)
-        data = json.loads(body)
-        assert data[0]["title"] == "Song2"
-        assert data[0]["versionOf"] == "New"
+    status, _, body = request("GET", port, "/api/1/rehearsals", headers=headers)
+    titles = [s["title"] for s in loads(body)]
+    assert titles == ["B", "C", "A"]
 
-        status, _, _ = request("DELETE", port, f"/api/1/suggestions/{sug_id}", headers=headers)
-        assert status == 200
-        status, _, body = request("GET", port, "/api/1/suggestions", headers=headers)
-        assert json.loads(body) == []
-    finally:
-        stop_test_server(httpd, thread)
 
+def test_roles_and_permissions(port):
+    # Create admin session (first user)
+    headers_admin = make_user_session("admin")
+    status, _, body = request("GET", port, "/api/me", headers=headers_admin)
+    assert loads(body)["role"] == "admin"
 
-def test_rehearsals_crud(tmp_path):
-    httpd, thread, port = start_test_server(tmp_path / "test.db")
-    try:
-        request("POST", port, "/api/register", {"username": "carol", "password": "pw"})
-        status, headers, _ = request("POST", port, "/api/login", {"username": "carol", "password": "pw"})
-        cookie = extract_cookie(headers)
-        headers = {"Cookie": cookie}
+    # Admin creates a suggestion
+    status, _, body = request("POST", port, "/api/1/suggestions", {"title": "Song"}, headers_admin)
+    sug_id = loads(body)["id"]
 
-        status, _, body = request("POST", port, "/api/1/rehearsals", {"title": "R1", "versionOf": "Orig"}, headers)
-        assert status == 201
-        reh_id = json.loads(body)["id"]
+    # Create second user session (bob)
+    headers_bob = make_user_session("bob")
+    status, _, body = request("GET", port, "/api/me", headers=headers_bob)
+    bob_id = loads(body)["id"]
+    assert loads(body)["role"] == "user"
 
-        status, _, _ = request("PUT", port, f"/api/1/rehearsals/{reh_id}", {"level": 5, "note": "ok"}, headers)
-        assert status == 200
+    # Create third user session (charlie)
+    headers_charlie = make_user_session("charlie")
 
-        status, _, _ = request("PUT", port, f"/api/1/rehearsals/{reh_id}", {"versionOf": "New"}, headers)
-        assert status == 200
+    # Promote bob to moderator
+    request("PUT", port, f"/api/users/{bob_id}", {"role": "moderator"}, headers_admin)
 
-        status, _, body = request("PUT", port, f"/api/1/rehearsals/{reh_id}/mastered", headers=headers)
-        assert status == 200
-        assert json.loads(body)["mastered"] is True
-        status, _, body = request("GET", port, "/api/1/rehearsals", headers=headers)
-        assert json.loads(body)[0]["versionOf"] == "New"
+    # Charlie (user) cannot edit admin's suggestion
+    status, _, _ = request("PUT", port, f"/api/1/suggestions/{sug_id}", {"title": "X"}, headers_charlie)
+    assert status == 403
 
-        status, _, _ = request("DELETE", port, f"/api/1/rehearsals/{reh_id}", headers=headers)
-        assert status == 200
-        status, _, body = request("GET", port, "/api/1/rehearsals", headers=headers)
-        assert json.loads(body) == []
-    finally:
-        stop_test_server(httpd, thread)
+    # Bob (moderator) can edit admin's suggestion
+    status, _, _ = request("PUT", port, f"/api/1/suggestions/{sug_id}", {"title": "Y"}, headers_bob)
+    assert status == 200
 
 
-def test_rehearsals_sorted_by_average(tmp_path):
-    httpd, thread, port = start_test_server(tmp_path / "test.db")
-    try:
-        request("POST", port, "/api/register", {"username": "u1", "password": "pw"})
-        status, headers, _ = request(
-            "POST", port, "/api/login", {"username": "u1", "password": "pw"}
-        )
-        cookie = extract_cookie(headers)
-        headers = {"Cookie": cookie}
-
-        # Create three songs and assign different levels
-        ids = []
-        for title in ["A", "B", "C"]:
-            status, _, body = request(
-                "POST", port, "/api/1/rehearsals", {"title": title}, headers
-            )
-            assert status == 201
-            ids.append(json.loads(body)["id"])
-
-        for rid, level in zip(ids, [3, 7, 5]):
-            status, _, _ = request(
-                "PUT", port, f"/api/1/rehearsals/{rid}", {"level": level}, headers
-            )
-            assert status == 200
-
-        status, _, body = request("GET", port, "/api/1/rehearsals", headers=headers)
-        titles = [s["title"] for s in json.loads(body)]
-        assert titles == ["B", "C", "A"]
-    finally:
-        stop_test_server(httpd, thread)
-
-
-def test_roles_and_permissions(tmp_path):
-    httpd, thread, port = start_test_server(tmp_path / "test.db")
-    try:
-        # Register and login admin (first user)
-        request("POST", port, "/api/register", {"username": "admin", "password": "pw"})
-        status, headers, body = request("POST", port, "/api/login", {"username": "admin", "password": "pw"})
-        cookie_admin = extract_cookie(headers)
-        headers_admin = {"Cookie": cookie_admin}
-        status, _, body = request("GET", port, "/api/me", headers=headers_admin)
-        assert json.loads(body)["role"] == "admin"
-
-        # Admin creates a suggestion
-        status, _, body = request("POST", port, "/api/1/suggestions", {"title": "Song"}, headers_admin)
-        sug_id = json.loads(body)["id"]
-
-        # Register and login second user (bob)
-        request("POST", port, "/api/register", {"username": "bob", "password": "pw"})
-        status, headers, _ = request("POST", port, "/api/login", {"username": "bob", "password": "pw"})
-        cookie_bob = extract_cookie(headers)
-        headers_bob = {"Cookie": cookie_bob}
-        status, _, body = request("GET", port, "/api/me", headers=headers_bob)
-        bob_id = json.loads(body)["id"]
-        assert json.loads(body)["role"] == "user"
-
-        # Register third user (charlie)
-        request("POST", port, "/api/register", {"username": "charlie", "password": "pw"})
-        status, headers, _ = request("POST", port, "/api/login", {"username": "charlie", "password": "pw"})
-        cookie_charlie = extract_cookie(headers)
-        headers_charlie = {"Cookie": cookie_charlie}
-
-        # Promote bob to moderator
-        request("PUT", port, f"/api/users/{bob_id}", {"role": "moderator"}, headers_admin)
-
-        # Charlie (user) cannot edit admin's suggestion
-        status, _, _ = request("PUT", port, f"/api/1/suggestions/{sug_id}", {"title": "X"}, headers_charlie)
-        assert status == 403
-
-        # Bob (moderator) can edit admin's suggestion
-        status, _, _ = request("PUT", port, f"/api/1/suggestions/{sug_id}", {"title": "Y"}, headers_bob)
-        assert status == 200
-    finally:
-        stop_test_server(httpd, thread)
+def test_session_lookups_are_indexed(clean_db):
+    # get_user_by_session() looks sessions up by token and purges them by
+    # expires_at on every request; both columns must lead an index.
+    conn = server.get_db_connection()
+    leading = {
+        conn.execute(f"PRAGMA index_info('{index['name']}')").fetchone()["name"]
+        for index in conn.execute("PRAGMA index_list(sessions)")
+    }
+    conn.close()
+    assert {"token", "expires_at"} <= leading
+
+
+def test_kdf_iterations_env_rejects_invalid_values(monkeypatch):
+    for raw in ("0", "-5", "abc", ""):
+        monkeypatch.setenv("BANDTRACK_KDF_ITERS", raw)
+        with pytest.raises(RuntimeError):
+            server.pbkdf2_iterations_from_env()
+    monkeypatch.setenv("BANDTRACK_KDF_ITERS", "7")
+    assert server.pbkdf2_iterations_from_env() == 7
+    monkeypatch.delenv("BANDTRACK_KDF_ITERS")
+    assert server.pbkdf2_iterations_from_env() == server.DEFAULT_PBKDF2_ITERATIONS
+
+
+def test_password_hash_at_production_cost(monkeypatch):
+    # The suite runs with BANDTRACK_KDF_ITERS=1; check the real work factor
+    # once so the production hashing path stays covered.
+    assert server.DEFAULT_PBKDF2_ITERATIONS == 100_000
+    monkeypatch.setattr(server, "PBKDF2_ITERATIONS", server.DEFAULT_PBKDF2_ITERATIONS)
+    salt, hashed = server.hash_password("secret")
+    assert hashed == hashlib.pbkdf2_hmac("sha256", b"secret", salt, 100_000)
+    assert server.verify_password("secret", salt, hashed)
+    assert not server.verify_password("wrong", salt, hashed)
@@ -1,52 +1,36 @@
-import json
-from test_api import start_test_server, stop_test_server, request, extract_cookie
-
-
-def test_group_invite_new_user(tmp_path):
-    httpd, thread, port = start_test_server(tmp_path / 'test.db')
-    try:
-        # Register admin user
-        request('POST', port, '/api/register', {'username': 'admin@example.com', 'password': 'pw'})
-        status, headers, _ = request('POST', port, '/api/login', {'username': 'admin@example.com', 'password': 'pw'})
-        cookie_admin = extract_cookie(headers)
-        headers_admin = {'Cookie': cookie_admin}
-
-        # Invite new user by email
-        status, _, body = request('POST', port, '/api/groups/1/invite', {'email': 'newbie@example.com'}, headers_admin)
-        assert status == 201
-        data = json.loads(body)
-        assert data['username'] == 'newbie@example.com'
-        assert 'temporaryPassword' in data
-        temp_pw = data['temporaryPassword']
-
-        # New user can login with temporary password
-        status, _, _ = request('POST', port, '/api/login', {'username': 'newbie@example.com', 'password': temp_pw})
-        assert status == 200
-    finally:
-        stop_test_server(httpd, thread)
-
-
-def test_group_invite_existing_user(tmp_path):
-    httpd, thread, port = start_test_server(tmp_path / 'test.db')
-    try:
-        # Register admin user
-        request('POST', port, '/api/register', {'username': 'admin@example.com', 'password': 'pw'})
-        status, headers, _ = request('POST', port, '/api/login', {'username': 'admin@example.com', 'password': 'pw'})
-        cookie_admin = extract_cookie(headers)
-        headers_admin = {'Cookie': cookie_admin}
-
-        # Register another user and remove from group
-        request('POST', port, '/api/register', {'username': 'bob@example.com', 'password': 'pw'})
-        status, _, body = request('GET', port, '/api/groups/1/members', headers=headers_admin)
-        members = json.loads(body)
-        bob_member = next(m for m in members if m['username'] == 'bob@example.com')
-        request('DELETE', port, '/api/groups/1/members', {'id': bob_member['id']}, headers_admin)
-
-        # Invite existing user back by email
-        status, _, body = request('POST', port, '/api/groups/1/invite', {'email': 'bob@example.com'}, headers_admin)
-        assert status == 201
-        data = json.loads(body)
-        assert data['username'] == 'bob@example.com'
-        assert 'temporaryPassword' not in data
-    finally:
-        stop_test_server(httpd, thread)
+from test_api import call, make_user_session, members_by, creds, loads
+
+
+def test_group_invite_new_user(clean_db):
+    # Admin user with an open session
+    headers_admin = make_user_session('admin@example.com')
+
+    # Invite new user by email
+    status, _, body = call('POST', '/api/groups/1/invite', {'email': 'newbie@example.com'}, headers_admin)
+    assert status == 201
+    data = loads(body)
+    assert data['username'] == 'newbie@example.com'
+    assert 'temporaryPassword' in data
+    temp_pw = data['temporaryPassword']
+
+    # New user can login with temporary password
+    status, _, _ = call('POST', '/api/login', {'username': 'newbie@example.com', 'password': temp_pw})
+    assert status == 200
+
+
+def test_group_invite_existing_user(clean_db):
+    # Admin user with an open session
+    headers_admin = make_user_session('admin@example.com')
+
+    # Register another user and remove from group
+    call('POST', '/api/register', creds('bob@example.com'))
+    status, _, body = call('GET', '/api/groups/1/members', headers=headers_admin)
+    bob_member = members_by('username', body)['bob@example.com']
+    call('DELETE', '/api/groups/1/members', {'id': bob_member['id']}, headers_admin)
+
+    # Invite existing user back by email
+    status, _, body = call('POST', '/api/groups/1/invite', {'email': 'bob@example.com'}, headers_admin)
+    assert status == 201
+    data = loads(body)
+    assert data['username'] == 'bob@example.com'
+    assert 'temporaryPassword' not in data
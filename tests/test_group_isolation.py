@@ -1,125 +1,108 @@
-import json
-from test_api import start_test_server, stop_test_server, request, extract_cookie
+from test_api import call, make_user_session, loads
 
 
-def test_group_isolation_and_context(tmp_path):
-    httpd, thread, port = start_test_server(tmp_path / 'test.db')
-    try:
-        # Alice registers and logs in (admin of default group 1)
-        request('POST', port, '/api/register', {'username': 'alice', 'password': 'pw'})
-        status, headers, _ = request('POST', port, '/api/login', {'username': 'alice', 'password': 'pw'})
-        cookie_alice = extract_cookie(headers)
-        headers_alice = {'Cookie': cookie_alice}
+def test_group_isolation_and_context(clean_db):
+    # Alice has a session (admin of default group 1)
+    headers_alice = make_user_session('alice')
 
-        # Create resources in default group 1
-        request('POST', port, '/api/1/suggestions', {'title': 'SongA'}, headers_alice)
-        request('POST', port, '/api/1/rehearsals', {'title': 'RehA'}, headers_alice)
-        request(
-            'POST',
-            port,
-            '/api/1/performances',
-            {'name': 'PerfA', 'date': '2024-01-01'},
-            headers_alice,
-        )
+    # Create resources in default group 1
+    call('POST', '/api/1/suggestions', {'title': 'SongA'}, headers_alice)
+    call('POST', '/api/1/rehearsals', {'title': 'RehA'}, headers_alice)
+    call(
+        'POST',
+        '/api/1/performances',
+        {'name': 'PerfA', 'date': '2024-01-01'},
+        headers_alice,
+    )
 
-        # Create second group and resources within it
-        status, _, body = request('POST', port, '/api/groups', {'name': 'Band2'}, headers_alice)
-        data = json.loads(body)
-        group2_id = data['id']
-        code = data['invitationCode']
+    # Create second group and resources within it
+    status, _, body = call('POST', '/api/groups', {'name': 'Band2'}, headers_alice)
+    data = loads(body)
+    group2_id = data['id']
+    code = data['invitationCode']
 
-        status, _, body = request(
-            'POST',
-            port,
-            f'/api/{group2_id}/suggestions',
-            {'title': 'SongB'},
-            headers_alice,
-        )
-        sug2_id = json.loads(body)['id']
-        request('POST', port, f'/api/{group2_id}/rehearsals', {'title': 'RehB'}, headers_alice)
-        request(
-            'POST',
-            port,
-            f'/api/{group2_id}/performances',
-            {'name': 'PerfB', 'date': '2024-02-02'},
-            headers_alice,
-        )
+    status, _, body = call(
+        'POST',
+        f'/api/{group2_id}/suggestions',
+        {'title': 'SongB'},
+        headers_alice,
+    )
+    sug2_id = loads(body)['id']
+    call('POST', f'/api/{group2_id}/rehearsals', {'title': 'RehB'}, headers_alice)
+    call(
+        'POST',
+        f'/api/{group2_id}/performances',
+        {'name': 'PerfB', 'date': '2024-02-02'},
+        headers_alice,
+    )
 
-        # Verify isolation for Alice across groups
-        status, _, body = request('GET', port, '/api/1/suggestions', headers=headers_alice)
-        assert [s['title'] for s in json.loads(body)] == ['SongA']
-        status, _, body = request('GET', port, f'/api/{group2_id}/suggestions', headers=headers_alice)
-        assert [s['title'] for s in json.loads(body)] == ['SongB']
+    # Verify isolation for Alice across groups
+    status, _, body = call('GET', '/api/1/suggestions', headers=headers_alice)
+    assert [s['title'] for s in loads(body)] == ['SongA']
+    status, _, body = call('GET', f'/api/{group2_id}/suggestions', headers=headers_alice)
+    assert [s['title'] for s in loads(body)] == ['SongB']
 
-        status, _, body = request('GET', port, '/api/1/rehearsals', headers=headers_alice)
-        assert [r['title'] for r in json.loads(body)] == ['RehA']
-        status, _, body = request('GET', port, f'/api/{group2_id}/rehearsals', headers=headers_alice)
-        assert [r['title'] for r in json.loads(body)] == ['RehB']
+    status, _, body = call('GET', '/api/1/rehearsals', headers=headers_alice)
+    assert [r['title'] for r in loads(body)] == ['RehA']
+    status, _, body = call('GET', f'/api/{group2_id}/rehearsals', headers=headers_alice)
+    assert [r['title'] for r in loads(body)] == ['RehB']
 
-        status, _, body = request('GET', port, '/api/1/performances', headers=headers_alice)
-        assert [p['name'] for p in json.loads(body)] == ['PerfA']
-        status, _, body = request('GET', port, f'/api/{group2_id}/performances', headers=headers_alice)
-        assert [p['name'] for p in json.loads(body)] == ['PerfB']
+    status, _, body = call('GET', '/api/1/performances', headers=headers_alice)
+    assert [p['name'] for p in loads(body)] == ['PerfA']
+    status, _, body = call('GET', f'/api/{group2_id}/performances', headers=headers_alice)
+    assert [p['name'] for p in loads(body)] == ['PerfB']
 
-        # Bob registers (only member of default group 1)
-        request('POST', port, '/api/register', {'username': 'bob', 'password': 'pw'})
-        status, headers, _ = request('POST', port, '/api/login', {'username': 'bob', 'password': 'pw'})
-        cookie_bob = extract_cookie(headers)
-        headers_bob = {'Cookie': cookie_bob}
+    # Bob has a session (only member of default group 1)
+    headers_bob = make_user_session('bob')
 
-        # Bob cannot access group2 before joining
-        status, _, _ = request('GET', port, f'/api/{group2_id}/suggestions', headers=headers_bob)
-        assert status == 403
-        status, _, _ = request('GET', port, f'/api/{group2_id}/rehearsals', headers=headers_bob)
-        assert status == 403
-        status, _, _ = request('GET', port, f'/api/{group2_id}/performances', headers=headers_bob)
-        assert status == 403
+    # Bob cannot access group2 before joining
+    status, _, _ = call('GET', f'/api/{group2_id}/suggestions', headers=headers_bob)
+    assert status == 403
+    status, _, _ = call('GET', f'/api/{group2_id}/rehearsals', headers=headers_bob)
+    assert status == 403
+    status, _, _ = call('GET', f'/api/{group2_id}/performances', headers=headers_bob)
+    assert status == 403
 
-        # Bob joins group2 via invitation code
-        status, _, _ = request(
-            'POST',
-            port,
-            '/api/groups/join',
-            {'code': code, 'nickname': 'Bobby'},
-            headers_bob,
-        )
-        assert status == 201
+    # Bob joins group2 via invitation code
+    status, _, _ = call(
+        'POST',
+        '/api/groups/join',
+        {'code': code, 'nickname': 'Bobby'},
+        headers_bob,
+    )
+    assert status == 201
 
-        # Switch Bob's context to group2
-        status, _, _ = request('PUT', port, '/api/context', {'groupId': group2_id}, headers=headers_bob)
-        assert status == 200
-        status, _, body = request('GET', port, '/api/context', headers=headers_bob)
-        assert json.loads(body)['id'] == group2_id
+    # Switch Bob's context to group2
+    status, _, _ = call('PUT', '/api/context', {'groupId': group2_id}, headers=headers_bob)
+    assert status == 200
+    status, _, body = call('GET', '/api/context', headers=headers_bob)
+    assert loads(body)['id'] == group2_id
 
-        # Bob sees only group2 items when using context
-        status, _, body = request('GET', port, '/api/suggestions', headers=headers_bob)
-        assert [s['title'] for s in json.loads(body)] == ['SongB']
-        status, _, body = request('GET', port, '/api/rehearsals', headers=headers_bob)
-        assert [r['title'] for r in json.loads(body)] == ['RehB']
-        status, _, body = request('GET', port, '/api/performances', headers=headers_bob)
-        assert [p['name'] for p in json.loads(body)] == ['PerfB']
+    # Bob sees only group2 items when using context
+    status, _, body = call('GET', '/api/suggestions', headers=headers_bob)
+    assert [s['title'] for s in loads(body)] == ['SongB']
+    status, _, body = call('GET', '/api/rehearsals', headers=headers_bob)
+    assert [r['title'] for r in loads(body)] == ['RehB']
+    status, _, body = call('GET', '/api/performances', headers=headers_bob)
+    assert [p['name'] for p in loads(body)] == ['PerfB']
 
-        # Role-based access: Bob cannot edit suggestion yet
-        status, _, _ = request(
-            'PUT',
-            port,
-            f'/api/suggestions/{sug2_id}',
-            {'title': 'SongB2'},
-            headers=headers_bob,
-        )
-        assert status == 403
+    # Role-based access: Bob cannot edit suggestion yet
+    status, _, _ = call(
+        'PUT',
+        f'/api/suggestions/{sug2_id}',
+        {'title': 'SongB2'},
+        headers=headers_bob,
+    )
+    assert status == 403
 
-        # Promote Bob to moderator and retry
-        status, _, body = request('GET', port, '/api/me', headers=headers_bob)
-        bob_id = json.loads(body)['id']
-        request('PUT', port, f'/api/users/{bob_id}', {'role': 'moderator'}, headers=headers_alice)
-        status, _, _ = request(
-            'PUT',
-            port,
-            f'/api/suggestions/{sug2_id}',
-            {'title': 'SongB2'},
-            headers=headers_bob,
-        )
-        assert status == 200
-    finally:
-        stop_test_server(httpd, thread)
+    # Promote Bob to moderator and retry
+    status, _, body = call('GET', '/api/me', headers=headers_bob)
+    bob_id = loads(body)['id']
+    call('PUT', f'/api/users/{bob_id}', {'role': 'moderator'}, headers=headers_alice)
+    status, _, _ = call(
+        'PUT',
+        f'/api/suggestions/{sug2_id}',
+        {'title': 'SongB2'},
+        headers=headers_bob,
+    )
+    assert status == 200
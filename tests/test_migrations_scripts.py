@@ -0,0 +1,88 @@
+import sqlite3
+
+import pytest
+
+from scripts.migrate_to_multigroup import migrate as migrate_to_multigroup
+from scripts.migrate_suggestion_votes import migrate as migrate_suggestion_votes
+from scripts.migrate_performance_location import migrate as migrate_performance_location
+
+
+@pytest.fixture
+def memory_db(request):
+    # Shared-cache in-memory database: the migration opens its own
+    # connection to the same URI while this one keeps the data alive.
+    uri = f"file:mig_{request.node.name}?mode=memory&cache=shared"
+    conn = sqlite3.connect(uri, uri=True)
+    yield uri, conn
+    conn.close()
+
+
+def seed(conn, table, rows):
+    # One executemany inside one transaction, whatever the row count
+    columns = ", ".join(rows[0])
+    placeholders = ", ".join("?" * len(rows[0]))
+    with conn:
+        conn.executemany(
+            f"INSERT INTO {table} ({columns}) VALUES ({placeholders})",
+            [tuple(row.values()) for row in rows],
+        )
+
+
+def test_migrate_to_multigroup(memory_db):
+    uri, conn = memory_db
+    cur = conn.cursor()
+    cur.execute("CREATE TABLE users (id INTEGER PRIMARY KEY, username TEXT, role TEXT)")
+    cur.execute("CREATE TABLE suggestions (id INTEGER PRIMARY KEY, title TEXT)")
+    cur.execute("CREATE TABLE rehearsals (id INTEGER PRIMARY KEY, title TEXT)")
+    cur.execute("CREATE TABLE performances (id INTEGER PRIMARY KEY, name TEXT)")
+    cur.execute(
+        "CREATE TABLE settings (id INTEGER PRIMARY KEY, group_name TEXT, dark_mode INTEGER)"
+    )
+    seed(conn, "users", [
+        {"id": 1, "username": "alice", "role": "admin"},
+        {"id": 2, "username": "bob", "role": None},
+    ])
+    seed(conn, "suggestions", [{"id": 1, "title": "Song"}])
+
+    assert migrate_to_multigroup(uri) is True
+
+    cur.execute("SELECT id, name FROM groups")
+    assert cur.fetchall() == [(1, "Groupe de musique")]
+    cur.execute("SELECT user_id, group_id, role FROM memberships ORDER BY user_id")
+    assert cur.fetchall() == [(1, 1, "admin"), (2, 1, "user")]
+    cur.execute("SELECT group_id FROM suggestions")
+    assert cur.fetchone()[0] == 1
+
+    assert migrate_to_multigroup(uri) is False
+
+
+def test_migrate_suggestion_votes(memory_db):
+    uri, conn = memory_db
+    cur = conn.cursor()
+    cur.execute("CREATE TABLE users (id INTEGER PRIMARY KEY)")
+    cur.execute("CREATE TABLE suggestions (id INTEGER PRIMARY KEY, likes INTEGER)")
+    seed(conn, "users", [{"id": 1}, {"id": 2}])
+    seed(conn, "suggestions", [{"id": 1, "likes": 5}])
+
+    assert migrate_suggestion_votes(uri) is True
+
+    cur.execute("SELECT suggestion_id, user_id FROM suggestion_votes ORDER BY user_id")
+    assert cur.fetchall() == [(1, 1), (1, 2)]
+    cur.execute("SELECT likes FROM suggestions WHERE id = 1")
+    assert cur.fetchone()[0] == 2
+
+    assert migrate_suggestion_votes(uri) is False
+
+
+def test_migrate_performance_location(memory_db):
+    uri, conn = memory_db
+    cur = conn.cursor()
+    cur.execute("CREATE TABLE performances (id INTEGER PRIMARY KEY, name TEXT)")
+    seed(conn, "performances", [{"id": 1, "name": "Gig"}])
+
+    assert migrate_performance_location(uri) is True
+
+    cur.execute("SELECT location FROM performances WHERE id = 1")
+    assert cur.fetchone()[0] == ""
+
+    assert migrate_performance_location(uri) is False
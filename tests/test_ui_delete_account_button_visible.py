@@ -1,38 +1,16 @@
-from test_api import start_test_server, stop_test_server, request, extract_cookie
-from playwright.sync_api import sync_playwright
+import pytest
 
+from _pw_helpers import authed_page
 
-def test_delete_account_button_visible(tmp_path):
-    httpd, thread, port = start_test_server(tmp_path / 'test.db')
-    try:
-        # register and login to obtain session cookie
-        request('POST', port, '/api/register', {'username': 'alice', 'password': 'pw'})
-        status, headers, _ = request('POST', port, '/api/login', {'username': 'alice', 'password': 'pw'})
-        assert status == 200
-        cookie = extract_cookie(headers)
-        headers = {'Cookie': cookie}
-        status, _, _ = request('POST', port, '/api/groups', {'name': 'Band'}, headers)
-        assert status == 201
-        session_value = cookie.split('=', 1)[1]
-        with sync_playwright() as p:
-            browser = p.chromium.launch()
-            context = browser.new_context()
-            context.add_cookies([
-                {
-                    'name': 'session_id',
-                    'value': session_value,
-                    'domain': '127.0.0.1',
-                    'path': '/',
-                }
-            ])
-            page = context.new_page()
-            page.goto(f'http://127.0.0.1:{port}/')
-            page.click('#hamburger')
-            page.click('#menu-settings')
-            page.wait_for_load_state('networkidle')
-            page.wait_for_selector('#delete-account-btn')
-            assert page.is_visible('#delete-account-btn')
-            context.close()
-            browser.close()
-    finally:
-        stop_test_server(httpd, thread)
+# Without Playwright, skip the module at collection, before any server starts
+pytest.importorskip("playwright")
+
+
+def test_delete_account_button_visible(ui_port, playwright_browser):
+    # user with an open session and a group of their own
+    page, context = authed_page(ui_port, playwright_browser, 'alice', group='Band')
+    page.click('#hamburger')
+    page.click('#menu-settings')
+    page.wait_for_selector('#delete-account-btn', state='visible')
+    assert page.is_visible('#delete-account-btn')
+    context.close()